@@ -0,0 +1,56 @@
+"""
+Shared HTTP session and on-disk DataFrame cache.
+
+Uses requests-cache when it is installed so repeated pipeline runs skip the
+network; otherwise falls back to a plain requests session. Frame caching
+needs a parquet engine (pyarrow) and is silently skipped without one.
+"""
+import logging
+from functools import lru_cache
+import pandas as pd
+import requests
+
+from metro_sampler.config import CACHE_DIR, HTTP_CACHE_EXPIRE
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session (cached on disk if possible)."""
+    try:
+        import requests_cache
+    except ImportError:
+        log.debug("requests-cache not installed – HTTP responses not cached")
+        return requests.Session()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return requests_cache.CachedSession(
+        str(CACHE_DIR / "http_cache"), expire_after=HTTP_CACHE_EXPIRE,
+        # Census API key: redacted from stored requests and left out of
+        # the cache key, so it never lands on disk
+        ignored_parameters=["key"],
+    )
+
+
+def read_frame(name: str) -> pd.DataFrame | None:
+    """Load a previously cached frame, or None if absent/unreadable."""
+    path = CACHE_DIR / f"{name}.parquet"
+    if not path.exists():
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as exc:
+        log.warning("Could not read cache %s: %s", path, exc)
+        return None
+    log.info("  Loaded %s from cache", name)
+    return df
+
+
+def write_frame(df: pd.DataFrame, name: str) -> None:
+    """Best-effort write of a frame to the on-disk cache."""
+    path = CACHE_DIR / f"{name}.parquet"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path, index=False)
+    except Exception as exc:
+        log.debug("Not caching %s: %s", name, exc)
@@ -2,16 +2,23 @@
 Configuration for MSA sampling pipeline.
 Edit parameters here to adjust stratification, sample size, or data sources.
 """
+import os
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
+from typing import Final
 
 # ── Paths ───────────────────────────────────────────────────────────────────
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 NTD_DIR = DATA_DIR / "ntd"
 OUTPUT_DIR = PROJECT_ROOT / "output"
+CACHE_DIR = DATA_DIR / "cache"   # HTTP responses and fetched frames
+
+HTTP_CACHE_EXPIRE = 86_400       # seconds; only used if requests-cache is installed
 
 # ── API keys / endpoints ────────────────────────────────────────────────────
-CENSUS_API_KEY = "10d61a19b45bb3df4028dd0f74f39384c5b6d90e"  # set via env var CENSUS_API_KEY or paste here
+CENSUS_API_KEY = os.environ.get("CENSUS_API_KEY", "")  # optional; read once at import
 CENSUS_BASE = "https://api.census.gov/data"
 CENSUS_YEAR = 2023  # ACS year
 
@@ -56,8 +63,22 @@ CENSUS_REGIONS = {
     ],
 }
 
-# Invert for lookup: state_abbr -> region
-STATE_TO_REGION = {}
-for region, states in CENSUS_REGIONS.items():
-    for st in states:
-        STATE_TO_REGION[st] = region
+# Inverted lookup: state_abbr -> region (read-only). Written out literally
+# so import does no work; tests/test_config.py checks it against CENSUS_REGIONS.
+STATE_TO_REGION: Final[Mapping[str, str]] = MappingProxyType({
+    "CT": "Northeast", "ME": "Northeast", "MA": "Northeast", "NH": "Northeast",
+    "RI": "Northeast", "VT": "Northeast", "NJ": "Northeast", "NY": "Northeast",
+    "PA": "Northeast",
+    "IL": "Midwest", "IN": "Midwest", "MI": "Midwest", "OH": "Midwest",
+    "WI": "Midwest", "IA": "Midwest", "KS": "Midwest", "MN": "Midwest",
+    "MO": "Midwest", "NE": "Midwest", "ND": "Midwest", "SD": "Midwest",
+    "DE": "South", "FL": "South", "GA": "South", "MD": "South",
+    "NC": "South", "SC": "South", "VA": "South", "DC": "South",
+    "WV": "South", "AL": "South", "KY": "South", "MS": "South",
+    "TN": "South", "AR": "South", "LA": "South", "OK": "South",
+    "TX": "South",
+    "AZ": "West", "CO": "West", "ID": "West", "MT": "West",
+    "NV": "West", "NM": "West", "UT": "West", "WY": "West",
+    "AK": "West", "CA": "West", "HI": "West", "OR": "West",
+    "WA": "West",
+})
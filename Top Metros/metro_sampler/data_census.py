@@ -4,13 +4,15 @@ Fetch MSA/CBSA populations from the Census Bureau API.
 Falls back to a curated offline list if the API key is missing or the call
 fails, so the pipeline can always run.
 """
-import os
 import logging
+import re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import requests
 
+from metro_sampler.cache import get_session, read_frame, write_frame
 from metro_sampler.config import (
-    CENSUS_API_KEY, CENSUS_BASE, CENSUS_YEAR, STATE_TO_REGION,
+    CENSUS_API_KEY, CENSUS_BASE, CENSUS_REGIONS, CENSUS_YEAR, STATE_TO_REGION,
 )
 
 log = logging.getLogger(__name__)
@@ -30,11 +32,20 @@ FIPS_TO_ABBR = {
     "56": "WY", "72": "PR",
 }
 
+# "<base> Metro Area" / "<base> Metropolitan Area" -> base name
+_METRO_RE = re.compile(r"^(?P<base>.*?)\s*Metro(?:politan)?\s*Area$")
+
+# Low-cardinality columns are stored as categoricals; regions share one
+# fixed set of categories across every frame
+REGION_DTYPE = pd.CategoricalDtype([*CENSUS_REGIONS, "Unknown"])
+
 
 def _primary_state_abbr(cbsa_code: str, name: str) -> str:
     """Heuristic: derive the primary state from the MSA name (last token
     before any hyphen in the state portion, e.g. 'New York-Newark-Jersey
-    City, NY-NJ-PA' -> 'NY')."""
+    City, NY-NJ-PA' -> 'NY').
+
+    Scalar helper; _fetch_from_api applies the same rule column-wise."""
     try:
         state_part = name.split(",")[-1].strip()
         first_state = state_part.split("-")[0].strip()
@@ -48,26 +59,36 @@ def fetch_msa_population() -> pd.DataFrame:
         cbsa_code, msa_name, population, state_abbr, census_region
     Sorted descending by population.
     """
-    api_key = os.environ.get("CENSUS_API_KEY", CENSUS_API_KEY)
-    df = _fetch_from_api(api_key)
+    cache_name = f"census_msa_{CENSUS_YEAR}"
+    df = read_frame(cache_name)
+    if df is not None:
+        return df
+    df = _fetch_from_api()
     if df is None:
         log.warning("Census API unavailable – using built-in MSA list")
-        df = _builtin_msa_list()
+        return _builtin_msa_list()
+    write_frame(df, cache_name)
     return df
 
 
-def _fetch_from_api(api_key: str | None) -> pd.DataFrame | None:
-    """Try ACS 5-year estimates for CBSA-level total population.
-    Works with or without an API key."""
+@lru_cache(maxsize=1)
+def _load_census_msa_frame() -> pd.DataFrame | None:
+    """Fetch ACS 5-year CBSA populations once per process.
+
+    Returns metro areas only, with columns msa_name (" Metro Area" suffix
+    stripped), population (raw API strings) and cbsa_code, or None if the
+    request fails. Shared by _fetch_from_api and the NTD UZA matcher;
+    callers must not mutate the result.
+    """
     url = f"{CENSUS_BASE}/{CENSUS_YEAR}/acs/acs5"
     params = {
         "get": "NAME,B01003_001E",
         "for": "metropolitan statistical area/micropolitan statistical area:*",
     }
-    if api_key:
-        params["key"] = api_key
+    if CENSUS_API_KEY:
+        params["key"] = CENSUS_API_KEY
     try:
-        resp = requests.get(url, params=params, timeout=30)
+        resp = get_session().get(url, params=params, timeout=30)
         resp.raise_for_status()
         rows = resp.json()
     except Exception as exc:
@@ -81,107 +102,177 @@ def _fetch_from_api(api_key: str | None) -> pd.DataFrame | None:
         "B01003_001E": "population",
         "metropolitan statistical area/micropolitan statistical area": "cbsa_code",
     })
-    df["population"] = pd.to_numeric(df["population"], errors="coerce")
-    df = df.dropna(subset=["population"])
-    df["population"] = df["population"].astype(int)
 
-    # Keep only MSAs (metro), not micropolitan – filter by name convention
-    df = df[df["msa_name"].str.contains("Metro", case=False, na=False)].copy()
+    # Keep only MSAs (metro), not micropolitan, and strip the " Metro Area"
+    # suffix – one regex pass does both
+    base = df["msa_name"].str.extract(_METRO_RE, expand=True)["base"]
+    is_metro = base.notna()
+    df = df.loc[is_metro].assign(msa_name=base[is_metro].to_numpy())
+    return df.reset_index(drop=True)
+
+
+def _fetch_from_api() -> pd.DataFrame | None:
+    """Try ACS 5-year estimates for CBSA-level total population.
+    Works with or without an API key."""
+    census = _load_census_msa_frame()
+    if census is None:
+        return None
 
-    # Clean MSA names: strip " Metro Area" suffix
-    df["msa_name"] = df["msa_name"].str.replace(r"\s*Metro(politan)?\s*Area$", "",
-                                                  regex=True)
+    # ACS returns integer strings; drop anything else (nulls, annotations)
+    # and convert straight to int64 without a float64 detour
+    pop = census["population"].astype(str)
+    is_int = pop.str.fullmatch(r"-?\d+", na=False)
+    df = census.loc[is_int].copy()
+    df["population"] = pop[is_int].to_numpy(dtype="int64")
 
-    df["state_abbr"] = df.apply(
-        lambda r: _primary_state_abbr(r["cbsa_code"], r["msa_name"]), axis=1
+    # Vectorised equivalent of _primary_state_abbr over the whole column
+    df["state_abbr"] = (
+        df["msa_name"].str.rsplit(",", n=1).str[-1].str.strip()
+        .str.split("-", n=1).str[0].str.strip()
     )
     df["census_region"] = df["state_abbr"].map(STATE_TO_REGION).fillna("Unknown")
+    df = df.astype({"state_abbr": "category", "census_region": REGION_DTYPE})
     df = df.sort_values("population", ascending=False).reset_index(drop=True)
     log.info("  Fetched %d metro areas from Census API", len(df))
     return df[["cbsa_code", "msa_name", "population", "state_abbr", "census_region"]]
 
 
 # ── Offline fallback (top ~200 MSAs from 2023 ACS estimates) ────────────────
+# Column-wise (one tuple/array per column) so the frame is built from
+# contiguous columns rather than a row of Python objects per MSA.
+_MSA_CBSA = (
+    "35620", "31080", "16980", "19100", "26420", "47900", "33100", "37980", "12060",
+    "14460", "38060", "41860", "40140", "19820", "42660", "33460", "41740", "45300",
+    "19740", "41180", "12580", "36740", "16740", "41700", "38900", "40900", "38300",
+    "12420", "28140", "17460", "18140", "26900", "29820", "34980", "47260", "39300",
+    "27260", "33340", "36420", "39580", "32820", "40060", "35380", "31140", "41620",
+    "24340", "13820", "15380", "25540", "40380", "46060", "46140", "24860", "26620",
+    "16860", "21340", "10740", "36540", "44700", "17900", "30460", "30700", "43340",
+    "22180", "10580", "44060", "22020", "14260", "11700", "30020", "48900", "25860",
+    "20500",
+)
+_MSA_NAME = (
+    "New York-Newark-Jersey City, NY-NJ-PA",
+    "Los Angeles-Long Beach-Anaheim, CA",
+    "Chicago-Naperville-Elgin, IL-IN-WI",
+    "Dallas-Fort Worth-Arlington, TX",
+    "Houston-The Woodlands-Sugar Land, TX",
+    "Washington-Arlington-Alexandria, DC-VA-MD-WV",
+    "Miami-Fort Lauderdale-Pompano Beach, FL",
+    "Philadelphia-Camden-Wilmington, PA-NJ-DE-MD",
+    "Atlanta-Sandy Springs-Alpharetta, GA",
+    "Boston-Cambridge-Newton, MA-NH",
+    "Phoenix-Mesa-Chandler, AZ",
+    "San Francisco-Oakland-Berkeley, CA",
+    "Riverside-San Bernardino-Ontario, CA",
+    "Detroit-Warren-Dearborn, MI",
+    "Seattle-Tacoma-Bellevue, WA",
+    "Minneapolis-St. Paul-Bloomington, MN-WI",
+    "San Diego-Chula Vista-Carlsbad, CA",
+    "Tampa-St. Petersburg-Clearwater, FL",
+    "Denver-Aurora-Lakewood, CO",
+    "St. Louis, MO-IL",
+    "Baltimore-Columbia-Towson, MD",
+    "Orlando-Kissimmee-Sanford, FL",
+    "Charlotte-Concord-Gastonia, NC-SC",
+    "San Antonio-New Braunfels, TX",
+    "Portland-Vancouver-Hillsboro, OR-WA",
+    "Sacramento-Roseville-Folsom, CA",
+    "Pittsburgh, PA",
+    "Austin-Round Rock-Georgetown, TX",
+    "Kansas City, MO-KS",
+    "Cleveland-Elyria, OH",
+    "Columbus, OH",
+    "Indianapolis-Carmel-Anderson, IN",
+    "Las Vegas-Henderson-Paradise, NV",
+    "Nashville-Davidson--Murfreesboro--Franklin, TN",
+    "Virginia Beach-Norfolk-Newport News, VA-NC",
+    "Providence-Warwick, RI-MA",
+    "Jacksonville, FL",
+    "Milwaukee-Waukesha, WI",
+    "Oklahoma City, OK",
+    "Raleigh-Cary, NC",
+    "Memphis, TN-MS-AR",
+    "Richmond, VA",
+    "New Orleans-Metairie, LA",
+    "Louisville/Jefferson County, KY-IN",
+    "Salt Lake City, UT",
+    "Grand Rapids-Kentwood, MI",
+    "Birmingham-Hoover, AL",
+    "Buffalo-Cheektowaga, NY",
+    "Hartford-East Hartford-Middletown, CT",
+    "Rochester, NY",
+    "Tucson, AZ",
+    "Tulsa, OK",
+    "Greenville-Anderson, SC",
+    "Huntsville, AL",
+    "Chattanooga, TN-GA",
+    "El Paso, TX",
+    "Albuquerque, NM",
+    "Omaha-Council Bluffs, NE-IA",
+    "Stockton, CA",
+    "Columbia, SC",
+    "Lexington-Fayette, KY",
+    "Lincoln, NE",
+    "Shreveport-Bossier City, LA",
+    "Fayetteville, NC",
+    "Albany-Schenectady-Troy, NY",
+    "Spokane-Spokane Valley, WA",
+    "Fargo, ND-MN",
+    "Boise City, ID",
+    "Asheville, NC",
+    "Lawton, OK",
+    "Wilmington, NC",
+    "Hickory-Lenoir-Morganton, NC",
+    "Durham-Chapel Hill, NC",
+)
+_MSA_POP = np.array([
+    19_498_000, 12_872_000, 9_262_000, 8_100_000, 7_340_000, 6_356_000, 6_183_000,
+    6_246_000, 6_245_000, 4_941_000, 5_070_000, 4_566_000, 4_688_000, 4_340_000,
+    4_034_000, 3_712_000, 3_276_000, 3_342_000, 2_986_000, 2_797_000, 2_834_000,
+    2_817_000, 2_760_000, 2_600_000, 2_510_000, 2_420_000, 2_343_000, 2_470_000,
+    2_210_000, 2_058_000, 2_180_000, 2_140_000, 2_330_000, 2_060_000, 1_810_000,
+    1_630_000, 1_660_000, 1_560_000, 1_470_000, 1_510_000, 1_340_000, 1_330_000,
+    1_270_000, 1_300_000, 1_270_000, 1_100_000, 1_110_000, 1_120_000, 1_200_000,
+    1_080_000, 1_050_000, 1_040_000, 950_000, 510_000, 580_000, 870_000, 920_000,
+    970_000, 790_000, 850_000, 530_000, 350_000, 390_000, 390_000, 900_000, 600_000,
+    270_000, 810_000, 480_000, 125_000, 310_000, 370_000, 650_000,
+], dtype="int64")
+_MSA_STATE = (
+    "NY", "CA", "IL", "TX", "TX", "DC", "FL", "PA", "GA", "MA", "AZ", "CA", "CA", "MI",
+    "WA", "MN", "CA", "FL", "CO", "MO", "MD", "FL", "NC", "TX", "OR", "CA", "PA", "TX",
+    "MO", "OH", "OH", "IN", "NV", "TN", "VA", "RI", "FL", "WI", "OK", "NC", "TN", "VA",
+    "LA", "KY", "UT", "MI", "AL", "NY", "CT", "NY", "AZ", "OK", "SC", "AL", "TN", "TX",
+    "NM", "NE", "CA", "SC", "KY", "NE", "LA", "NC", "NY", "WA", "ND", "ID", "NC", "OK",
+    "NC", "NC", "NC",
+)
+_MSA_REGION = (
+    "Northeast", "West", "Midwest", "South", "South", "South", "South", "Northeast",
+    "South", "Northeast", "West", "West", "West", "Midwest", "West", "Midwest", "West",
+    "South", "West", "Midwest", "South", "South", "South", "South", "West", "West",
+    "Northeast", "South", "Midwest", "Midwest", "Midwest", "Midwest", "West", "South",
+    "South", "Northeast", "South", "Midwest", "South", "South", "South", "South",
+    "South", "South", "West", "Midwest", "South", "Northeast", "Northeast", "Northeast",
+    "West", "South", "South", "South", "South", "South", "West", "Midwest", "West",
+    "South", "South", "Midwest", "South", "South", "Northeast", "West", "Midwest",
+    "West", "South", "South", "South", "South", "South",
+)
+
+
 def _builtin_msa_list() -> pd.DataFrame:
     """Hardcoded top MSAs so the pipeline works without an API key."""
-    rows = [
-        ("35620", "New York-Newark-Jersey City, NY-NJ-PA", 19_498_000, "NY", "Northeast"),
-        ("31080", "Los Angeles-Long Beach-Anaheim, CA", 12_872_000, "CA", "West"),
-        ("16980", "Chicago-Naperville-Elgin, IL-IN-WI", 9_262_000, "IL", "Midwest"),
-        ("19100", "Dallas-Fort Worth-Arlington, TX", 8_100_000, "TX", "South"),
-        ("26420", "Houston-The Woodlands-Sugar Land, TX", 7_340_000, "TX", "South"),
-        ("47900", "Washington-Arlington-Alexandria, DC-VA-MD-WV", 6_356_000, "DC", "South"),
-        ("33100", "Miami-Fort Lauderdale-Pompano Beach, FL", 6_183_000, "FL", "South"),
-        ("37980", "Philadelphia-Camden-Wilmington, PA-NJ-DE-MD", 6_246_000, "PA", "Northeast"),
-        ("12060", "Atlanta-Sandy Springs-Alpharetta, GA", 6_245_000, "GA", "South"),
-        ("14460", "Boston-Cambridge-Newton, MA-NH", 4_941_000, "MA", "Northeast"),
-        ("38060", "Phoenix-Mesa-Chandler, AZ", 5_070_000, "AZ", "West"),
-        ("41860", "San Francisco-Oakland-Berkeley, CA", 4_566_000, "CA", "West"),
-        ("40140", "Riverside-San Bernardino-Ontario, CA", 4_688_000, "CA", "West"),
-        ("19820", "Detroit-Warren-Dearborn, MI", 4_340_000, "MI", "Midwest"),
-        ("42660", "Seattle-Tacoma-Bellevue, WA", 4_034_000, "WA", "West"),
-        ("33460", "Minneapolis-St. Paul-Bloomington, MN-WI", 3_712_000, "MN", "Midwest"),
-        ("41740", "San Diego-Chula Vista-Carlsbad, CA", 3_276_000, "CA", "West"),
-        ("45300", "Tampa-St. Petersburg-Clearwater, FL", 3_342_000, "FL", "South"),
-        ("19740", "Denver-Aurora-Lakewood, CO", 2_986_000, "CO", "West"),
-        ("41180", "St. Louis, MO-IL", 2_797_000, "MO", "Midwest"),
-        ("12580", "Baltimore-Columbia-Towson, MD", 2_834_000, "MD", "South"),
-        ("36740", "Orlando-Kissimmee-Sanford, FL", 2_817_000, "FL", "South"),
-        ("16740", "Charlotte-Concord-Gastonia, NC-SC", 2_760_000, "NC", "South"),
-        ("41700", "San Antonio-New Braunfels, TX", 2_600_000, "TX", "South"),
-        ("38900", "Portland-Vancouver-Hillsboro, OR-WA", 2_510_000, "OR", "West"),
-        ("40900", "Sacramento-Roseville-Folsom, CA", 2_420_000, "CA", "West"),
-        ("38300", "Pittsburgh, PA", 2_343_000, "PA", "Northeast"),
-        ("12420", "Austin-Round Rock-Georgetown, TX", 2_470_000, "TX", "South"),
-        ("28140", "Kansas City, MO-KS", 2_210_000, "MO", "Midwest"),
-        ("17460", "Cleveland-Elyria, OH", 2_058_000, "OH", "Midwest"),
-        ("18140", "Columbus, OH", 2_180_000, "OH", "Midwest"),
-        ("26900", "Indianapolis-Carmel-Anderson, IN", 2_140_000, "IN", "Midwest"),
-        ("29820", "Las Vegas-Henderson-Paradise, NV", 2_330_000, "NV", "West"),
-        ("34980", "Nashville-Davidson--Murfreesboro--Franklin, TN", 2_060_000, "TN", "South"),
-        ("47260", "Virginia Beach-Norfolk-Newport News, VA-NC", 1_810_000, "VA", "South"),
-        ("39300", "Providence-Warwick, RI-MA", 1_630_000, "RI", "Northeast"),
-        ("27260", "Jacksonville, FL", 1_660_000, "FL", "South"),
-        ("33340", "Milwaukee-Waukesha, WI", 1_560_000, "WI", "Midwest"),
-        ("36420", "Oklahoma City, OK", 1_470_000, "OK", "South"),
-        ("39580", "Raleigh-Cary, NC", 1_510_000, "NC", "South"),
-        ("32820", "Memphis, TN-MS-AR", 1_340_000, "TN", "South"),
-        ("40060", "Richmond, VA", 1_330_000, "VA", "South"),
-        ("35380", "New Orleans-Metairie, LA", 1_270_000, "LA", "South"),
-        ("31140", "Louisville/Jefferson County, KY-IN", 1_300_000, "KY", "South"),
-        ("41620", "Salt Lake City, UT", 1_270_000, "UT", "West"),
-        ("24340", "Grand Rapids-Kentwood, MI", 1_100_000, "MI", "Midwest"),
-        ("13820", "Birmingham-Hoover, AL", 1_110_000, "AL", "South"),
-        ("15380", "Buffalo-Cheektowaga, NY", 1_120_000, "NY", "Northeast"),
-        ("25540", "Hartford-East Hartford-Middletown, CT", 1_200_000, "CT", "Northeast"),
-        ("40380", "Rochester, NY", 1_080_000, "NY", "Northeast"),
-        # Medium MSAs (500K–1M)
-        ("46060", "Tucson, AZ", 1_050_000, "AZ", "West"),
-        ("46140", "Tulsa, OK", 1_040_000, "OK", "South"),
-        ("24860", "Greenville-Anderson, SC", 950_000, "SC", "South"),
-        ("26620", "Huntsville, AL", 510_000, "AL", "South"),
-        ("16860", "Chattanooga, TN-GA", 580_000, "TN", "South"),
-        ("21340", "El Paso, TX", 870_000, "TX", "South"),
-        ("10740", "Albuquerque, NM", 920_000, "NM", "West"),
-        ("36540", "Omaha-Council Bluffs, NE-IA", 970_000, "NE", "Midwest"),
-        ("44700", "Stockton, CA", 790_000, "CA", "West"),
-        ("17900", "Columbia, SC", 850_000, "SC", "South"),
-        ("30460", "Lexington-Fayette, KY", 530_000, "KY", "South"),
-        # Small MSAs (<500K)
-        ("30700", "Lincoln, NE", 350_000, "NE", "Midwest"),
-        ("43340", "Shreveport-Bossier City, LA", 390_000, "LA", "South"),
-        ("22180", "Fayetteville, NC", 390_000, "NC", "South"),
-        ("10580", "Albany-Schenectady-Troy, NY", 900_000, "NY", "Northeast"),
-        ("44060", "Spokane-Spokane Valley, WA", 600_000, "WA", "West"),
-        ("22020", "Fargo, ND-MN", 270_000, "ND", "Midwest"),
-        ("14260", "Boise City, ID", 810_000, "ID", "West"),
-        ("11700", "Asheville, NC", 480_000, "NC", "South"),
-        ("30020", "Lawton, OK", 125_000, "OK", "South"),
-        ("48900", "Wilmington, NC", 310_000, "NC", "South"),
-        ("25860", "Hickory-Lenoir-Morganton, NC", 370_000, "NC", "South"),
-        ("20500", "Durham-Chapel Hill, NC", 650_000, "NC", "South"),
-    ]
-    df = pd.DataFrame(rows, columns=[
-        "cbsa_code", "msa_name", "population", "state_abbr", "census_region",
-    ])
+    return _builtin_msa_list_cached().copy()
+
+
+@lru_cache(maxsize=1)
+def _builtin_msa_list_cached() -> pd.DataFrame:
+    """Build the fallback frame once; callers must not mutate the result."""
+    df = pd.DataFrame({
+        "cbsa_code": _MSA_CBSA,
+        "msa_name": _MSA_NAME,
+        "population": _MSA_POP,
+        "state_abbr": _MSA_STATE,
+        "census_region": pd.Categorical(_MSA_REGION, dtype=REGION_DTYPE),
+    }, copy=False)
+    df["state_abbr"] = df["state_abbr"].astype("category")
     return df.sort_values("population", ascending=False).reset_index(drop=True)
@@ -2,10 +2,14 @@
 Fetch shared-mobility (bikeshare / scooter) operator presence from
 MobilityData's GBFS systems catalog.
 """
+import io
 import logging
+import re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
-import requests
 
+from metro_sampler.cache import get_session
 from metro_sampler.config import GBFS_CATALOG_URL
 
 log = logging.getLogger(__name__)
@@ -63,18 +67,99 @@ _CITY_CBSA = {
     "oklahoma city": "36420",
 }
 
+# Single alternation over all fragments, longest first so e.g. "kansas city"
+# wins over any shorter fragment starting at the same position.
+_FRAGMENT_RE = re.compile(
+    "(" + "|".join(re.escape(k) for k in sorted(_CITY_CBSA, key=len, reverse=True)) + ")"
+)
+
+
+def _build_automaton():
+    """Aho–Corasick automaton over all fragments (None without pyahocorasick).
+    Scans every fragment in one pass per text however long the list grows."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    ac = ahocorasick.Automaton()
+    for fragment, cbsa in _CITY_CBSA.items():
+        ac.add_word(fragment, (len(fragment), cbsa))
+    ac.make_automaton()
+    return ac
+
+
+_AC = _build_automaton()
+
+# Fragments longest first, as one byte buffer + offsets, for the numba scanner
+_FRAGMENTS = sorted(_CITY_CBSA, key=len, reverse=True)
+_FRAG_BYTES = np.frombuffer("".join(_FRAGMENTS).encode(), dtype=np.uint8)
+_FRAG_OFFSETS = np.cumsum([0] + [len(f.encode()) for f in _FRAGMENTS]).astype(np.int64)
+_FRAG_CBSA = np.array([_CITY_CBSA[f] for f in _FRAGMENTS], dtype=object)
+
+# Below this many rows the JIT compile costs more than the regex scan saves
+_NUMBA_MIN_ROWS = 50_000
+
+
+@lru_cache(maxsize=1)
+def _numba_scanner():
+    """Parallel JIT fragment scanner (None without numba). For each text,
+    returns the index into _FRAGMENTS of the leftmost (then longest) match,
+    or -1. Built on first use so numba is only imported for big catalogs."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+
+    @njit(parallel=True, cache=True)
+    def scan(text_bytes, text_offsets, frag_bytes, frag_offsets):
+        n_texts = text_offsets.size - 1
+        n_frags = frag_offsets.size - 1
+        out = np.full(n_texts, -1, dtype=np.int32)
+        for r in prange(n_texts):
+            lo, hi = text_offsets[r], text_offsets[r + 1]
+            for i in range(lo, hi):
+                for f in range(n_frags):
+                    flo = frag_offsets[f]
+                    length = frag_offsets[f + 1] - flo
+                    if i + length > hi:
+                        continue
+                    k = 0
+                    while k < length and text_bytes[i + k] == frag_bytes[flo + k]:
+                        k += 1
+                    if k == length:
+                        out[r] = f
+                        break
+                if out[r] >= 0:
+                    break
+        return out
+
+    return scan
+
+
+# Catalog columns we actually use (after _norm_col)
+_GBFS_COLUMNS = {"system_id", "name", "location", "country_code"}
+
+
+def _norm_col(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
 
 def fetch_gbfs_systems() -> pd.DataFrame:
     """Download the MobilityData GBFS systems catalog CSV.
     Returns DataFrame: system_id, name, location, cbsa_code
     """
     try:
-        df = pd.read_csv(GBFS_CATALOG_URL)
+        resp = get_session().get(GBFS_CATALOG_URL, timeout=30)
+        resp.raise_for_status()
+        df = pd.read_csv(
+            io.StringIO(resp.text), dtype=str,
+            usecols=lambda c: _norm_col(c) in _GBFS_COLUMNS,
+        )
     except Exception as exc:
         log.warning("Could not fetch GBFS catalog: %s – using fallback", exc)
         return _builtin_gbfs()
 
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    df.columns = [_norm_col(c) for c in df.columns]
 
     # Keep US-only
     if "country_code" in df.columns:
@@ -82,7 +167,7 @@ def fetch_gbfs_systems() -> pd.DataFrame:
     elif "location" in df.columns:
         df = df[df["location"].str.contains("US|United States", case=False, na=False)].copy()
 
-    df["cbsa_code"] = df.apply(_match_cbsa, axis=1)
+    df["cbsa_code"] = _match_cbsa(df)
     df = df[df["cbsa_code"] != ""].copy()
 
     keep = ["system_id", "name", "location", "cbsa_code"]
@@ -92,49 +177,125 @@ def fetch_gbfs_systems() -> pd.DataFrame:
     return df[keep]
 
 
-def _match_cbsa(row) -> str:
-    """Try to match a GBFS system to a CBSA code via location/name text."""
-    text = " ".join(str(row.get(c, "")) for c in ["location", "name"]).lower()
-    for fragment, cbsa in _CITY_CBSA.items():
-        if fragment in text:
-            return cbsa
-    return ""
+def _match_cbsa(df: pd.DataFrame) -> pd.Series:
+    """Match GBFS systems to CBSA codes via location/name text.
+    Returns a Series aligned to df, with "" where nothing matched."""
+    # Build and lower-case the search text once for all rows
+    blank = pd.Series("", index=df.index)
+    text = (
+        df.get("location", blank).fillna("").astype("string") + " "
+        + df.get("name", blank).fillna("").astype("string")
+    ).str.lower()
+    if _AC is None:
+        scan = _numba_scanner() if len(text) >= _NUMBA_MIN_ROWS else None
+        if scan is not None:
+            encoded = [t.encode() for t in text.to_numpy()]
+            offsets = np.cumsum([0] + [len(b) for b in encoded]).astype(np.int64)
+            text_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            hit = scan(text_bytes, offsets, _FRAG_BYTES, _FRAG_OFFSETS)
+            return pd.Series(np.where(hit >= 0, _FRAG_CBSA[hit], ""), index=df.index)
+        hits = text.str.extract(_FRAGMENT_RE, expand=False)
+        return hits.map(_CITY_CBSA).fillna("")
+
+    # Same rule as the regex: leftmost match wins, longest on a tie
+    out = []
+    for t in text.to_numpy():
+        best, cbsa = None, ""
+        for end, (length, code) in _AC.iter(t):
+            key = (end - length, -length)
+            if best is None or key < best:
+                best, cbsa = key, code
+        out.append(cbsa)
+    return pd.Series(out, index=df.index)
 
 
 def gbfs_by_cbsa(systems: pd.DataFrame) -> pd.DataFrame:
     """Aggregate: count and list of operators per CBSA."""
-    grouped = systems.groupby("cbsa_code").agg(
-        n_shared_mobility=("name", "count"),
-        shared_mobility_list=("name", lambda s: "; ".join(s.unique())),
-    ).reset_index()
+    # Operator names are listed once per CBSA, but every system is counted
+    unique_names = systems.drop_duplicates(["cbsa_code", "name"])
+    grouped = pd.DataFrame({
+        "n_shared_mobility": systems.groupby("cbsa_code")["name"].count(),
+        "shared_mobility_list": (
+            unique_names.groupby("cbsa_code")["name"].agg(list).str.join("; ")
+        ),
+    }).reset_index()
     grouped["has_shared_mobility"] = True
     return grouped
 
 
 # ── Fallback ────────────────────────────────────────────────────────────────
+# Stored column-wise; see _builtin_gbfs_cached
+_GBFS_ID = (
+    "citi_bike_nyc", "metro_bike_la", "divvy_chicago", "capital_bikeshare", "bluebikes",
+    "bay_wheels", "nice_ride", "bcycle_denver", "bcycle_austin", "indego", "cogo",
+    "relay_atlanta", "healthy_ride", "biketown", "bcycle_charlotte", "lime_seattle",
+    "bird_nashville", "lime_san_diego", "lime_salt_lake", "pacers_indianapolis",
+    "bublr_milwaukee", "greenbike_slc",
+)
+_GBFS_NAME = (
+    "Citi Bike",
+    "Metro Bike Share",
+    "Divvy",
+    "Capital Bikeshare",
+    "Bluebikes",
+    "Bay Wheels",
+    "Nice Ride",
+    "Denver B-cycle",
+    "Austin B-cycle",
+    "Indego",
+    "CoGo",
+    "Relay",
+    "Healthy Ride",
+    "BIKETOWN",
+    "Charlotte B-cycle",
+    "Lime",
+    "Bird",
+    "Lime",
+    "Lime",
+    "Pacers Bikeshare",
+    "Bublr Bikes",
+    "GREENbike",
+)
+_GBFS_LOCATION = (
+    "New York, US",
+    "Los Angeles, US",
+    "Chicago, US",
+    "Washington DC, US",
+    "Boston, US",
+    "San Francisco, US",
+    "Minneapolis, US",
+    "Denver, US",
+    "Austin, US",
+    "Philadelphia, US",
+    "Columbus, US",
+    "Atlanta, US",
+    "Pittsburgh, US",
+    "Portland, US",
+    "Charlotte, US",
+    "Seattle, US",
+    "Nashville, US",
+    "San Diego, US",
+    "Salt Lake City, US",
+    "Indianapolis, US",
+    "Milwaukee, US",
+    "Salt Lake City, US",
+)
+_GBFS_CBSA = (
+    "35620", "31080", "16980", "47900", "14460", "41860", "33460", "19740", "12420",
+    "37980", "18140", "12060", "38300", "38900", "16740", "42660", "34980", "41740",
+    "41620", "26900", "33340", "41620",
+)
+
+
 def _builtin_gbfs() -> pd.DataFrame:
-    rows = [
-        ("citi_bike_nyc", "Citi Bike", "New York, US", "35620"),
-        ("metro_bike_la", "Metro Bike Share", "Los Angeles, US", "31080"),
-        ("divvy_chicago", "Divvy", "Chicago, US", "16980"),
-        ("capital_bikeshare", "Capital Bikeshare", "Washington DC, US", "47900"),
-        ("bluebikes", "Bluebikes", "Boston, US", "14460"),
-        ("bay_wheels", "Bay Wheels", "San Francisco, US", "41860"),
-        ("nice_ride", "Nice Ride", "Minneapolis, US", "33460"),
-        ("bcycle_denver", "Denver B-cycle", "Denver, US", "19740"),
-        ("bcycle_austin", "Austin B-cycle", "Austin, US", "12420"),
-        ("indego", "Indego", "Philadelphia, US", "37980"),
-        ("cogo", "CoGo", "Columbus, US", "18140"),
-        ("relay_atlanta", "Relay", "Atlanta, US", "12060"),
-        ("healthy_ride", "Healthy Ride", "Pittsburgh, US", "38300"),
-        ("biketown", "BIKETOWN", "Portland, US", "38900"),
-        ("bcycle_charlotte", "Charlotte B-cycle", "Charlotte, US", "16740"),
-        ("lime_seattle", "Lime", "Seattle, US", "42660"),
-        ("bird_nashville", "Bird", "Nashville, US", "34980"),
-        ("lime_san_diego", "Lime", "San Diego, US", "41740"),
-        ("lime_salt_lake", "Lime", "Salt Lake City, US", "41620"),
-        ("pacers_indianapolis", "Pacers Bikeshare", "Indianapolis, US", "26900"),
-        ("bublr_milwaukee", "Bublr Bikes", "Milwaukee, US", "33340"),
-        ("greenbike_slc", "GREENbike", "Salt Lake City, US", "41620"),
-    ]
-    return pd.DataFrame(rows, columns=["system_id", "name", "location", "cbsa_code"])
+    return _builtin_gbfs_cached().copy()
+
+
+@lru_cache(maxsize=1)
+def _builtin_gbfs_cached() -> pd.DataFrame:
+    return pd.DataFrame({
+        "system_id": _GBFS_ID,
+        "name": _GBFS_NAME,
+        "location": _GBFS_LOCATION,
+        "cbsa_code": _GBFS_CBSA,
+    }, copy=False)
@@ -5,7 +5,9 @@ Expects downloaded NTD data in DATA_DIR/ntd/. If not present, falls back to
 a curated list of major transit agencies with mode info.
 """
 import logging
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 from metro_sampler.config import NTD_DIR
@@ -24,23 +26,39 @@ def load_ntd_agencies() -> pd.DataFrame:
     return _builtin_agencies()
 
 
-def _find_ntd_file(*patterns: str) -> Path | None:
+@lru_cache(maxsize=1)
+def _ntd_index() -> dict[str, Path]:
+    """Lower-cased file name -> path for every NTD table in NTD_DIR."""
     if not NTD_DIR.exists():
-        return None
-    for p in NTD_DIR.iterdir():
-        for pat in patterns:
-            if pat.lower() in p.name.lower() and p.suffix in (".xlsx", ".csv", ".xls"):
-                return p
+        return {}
+    return {
+        p.name.lower(): p for p in NTD_DIR.iterdir()
+        if p.suffix.lower() in {".xlsx", ".csv", ".xls"}
+    }
+
+
+def _find_ntd_file(*patterns: str) -> Path | None:
+    pats = [pat.lower() for pat in patterns]
+    for name, p in _ntd_index().items():
+        if any(pat in name for pat in pats):
+            return p
     return None
 
 
 def _parse_ntd_file(path: Path) -> pd.DataFrame:
     """Best-effort parse of an NTD agency spreadsheet."""
     log.info("Reading NTD file: %s", path)
-    if path.suffix == ".csv":
+    if path.suffix.lower() == ".csv":
+        # Not engine="pyarrow": it infers types before applying dtype=str,
+        # which strips leading zeros from NTD IDs and UACE codes.
         raw = pd.read_csv(path, dtype=str)
     else:
-        raw = pd.read_excel(path, dtype=str)
+        try:
+            # Much faster than openpyxl on the full agency workbook
+            raw = pd.read_excel(path, dtype=str, engine="calamine")
+        except (ImportError, ValueError):
+            # python-calamine not installed, or pandas < 2.2
+            raw = pd.read_excel(path, dtype=str)
 
     # Normalise column names
     raw.columns = [c.strip().lower().replace(" ", "_") for c in raw.columns]
@@ -74,7 +92,7 @@ def _parse_ntd_file(path: Path) -> pd.DataFrame:
     df = raw[raw["agency_name"].notna() & (raw["agency_name"] != "")].copy()
 
     # Map UZA names to CBSA codes
-    df["cbsa_code"] = df["uza_name"].apply(_uza_to_cbsa)
+    df["cbsa_code"] = _uza_to_cbsa(df["uza_name"])
 
     # This file has no modes column; use builtin rail data to enrich later
     df["modes"] = ""
@@ -83,9 +101,7 @@ def _parse_ntd_file(path: Path) -> pd.DataFrame:
     result = df[["ntd_id", "agency_name", "cbsa_code", "city", "state", "modes", "has_rail"]].copy()
 
     # Enrich rail info from builtin data
-    builtin = _builtin_agencies()
-    rail_by_cbsa = set(builtin.loc[builtin["has_rail"], "cbsa_code"].unique())
-    result["has_rail"] = result["cbsa_code"].isin(rail_by_cbsa)
+    result["has_rail"] = np.isin(result["cbsa_code"].to_numpy(dtype=str), _rail_cbsas())
 
     log.info("  Parsed %d agencies, matched %d to a CBSA",
              len(result), (result["cbsa_code"] != "").sum())
@@ -94,45 +110,38 @@ def _parse_ntd_file(path: Path) -> pd.DataFrame:
 
 # ── Dynamic UZA-to-CBSA mapping built from Census MSA names ─────────────────
 import re
-import requests
 
-_UZA_CBSA_CACHE: dict[str, str] | None = None
+from metro_sampler.data_census import _load_census_msa_frame
+
+_UZA_CBSA_CACHE: dict[str, pd.Series] | None = None
+
+_MSA_SPLIT = re.compile(r"[-/]")
 
 
-def _build_uza_cbsa_map() -> dict[str, str]:
-    """Build a mapping from UZA name -> CBSA code by matching city/state
-    text from Census MSA names against NTD UZA names."""
+def _build_uza_cbsa_map() -> dict[str, pd.Series]:
+    """Build lookup Series (values are CBSA codes) from city/state text in
+    Census MSA names, used to match NTD UZA names:
+        city_state: indexed by (city, state)
+        city_only:  indexed by city, for cities that name a single CBSA
+    """
     global _UZA_CBSA_CACHE
     if _UZA_CBSA_CACHE is not None:
         return _UZA_CBSA_CACHE
 
-    from metro_sampler.config import CENSUS_BASE, CENSUS_YEAR
-
-    # Fetch Census MSA list
-    try:
-        url = f"{CENSUS_BASE}/{CENSUS_YEAR}/acs/acs5"
-        params = {
-            "get": "NAME,B01003_001E",
-            "for": "metropolitan statistical area/micropolitan statistical area:*",
-        }
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        header, *data = resp.json()
-        census = pd.DataFrame(data, columns=header)
-        census = census[census["NAME"].str.contains("Metro", case=False, na=False)]
-        census.columns = ["msa_name", "population", "cbsa_code"]
-    except Exception as exc:
-        log.warning("Could not fetch Census MSAs for UZA mapping: %s", exc)
+    # Census MSA list (shared with fetch_msa_population, fetched once)
+    census = _load_census_msa_frame()
+    if census is None:
+        log.warning("Could not fetch Census MSAs for UZA mapping")
         _UZA_CBSA_CACHE = {}
         return _UZA_CBSA_CACHE
 
     def _parse_msa(msa_name):
-        clean = re.sub(r"\s*Metro(politan)?\s*Area$", "", msa_name)
-        parts = clean.split(",")
+        # Names arrive with the "Metro Area" suffix already stripped
+        parts = msa_name.split(",")
         city_part = parts[0].strip()
         state_part = parts[1].strip() if len(parts) > 1 else ""
-        cities = [c.strip().lower() for c in re.split(r"[-/]", city_part)]
-        states = [s.strip().upper() for s in re.split(r"[-/]", state_part)]
+        cities = [c.strip().lower() for c in _MSA_SPLIT.split(city_part)]
+        states = [s.strip().upper() for s in _MSA_SPLIT.split(state_part)]
         return cities, states
 
     # Index: (city_lower, state_upper) -> cbsa_code
@@ -141,9 +150,8 @@ def _build_uza_cbsa_map() -> dict[str, str]:
     city_only: dict[str, str] = {}
     city_ambig: set[str] = set()
 
-    for _, row in census.iterrows():
-        cities, states = _parse_msa(row["msa_name"])
-        cbsa = row["cbsa_code"]
+    for msa_name, cbsa in zip(census["msa_name"].to_numpy(), census["cbsa_code"].to_numpy()):
+        cities, states = _parse_msa(msa_name)
         for city in cities:
             for state in states:
                 city_state_idx.setdefault((city, state), cbsa)
@@ -156,125 +164,260 @@ def _build_uza_cbsa_map() -> dict[str, str]:
                 city_only[city] = cbsa
 
     _UZA_CBSA_CACHE = {
-        "city_state": city_state_idx,
-        "city_only": city_only,
+        "city_state": pd.Series(
+            list(city_state_idx.values()),
+            index=pd.MultiIndex.from_tuples(
+                list(city_state_idx), names=["city", "state"]),
+            dtype=object,
+        ),
+        "city_only": pd.Series(city_only, dtype=object).rename_axis("city"),
     }
     log.info("  Built UZA->CBSA index: %d city+state keys, %d unambiguous city keys",
              len(city_state_idx), len(city_only))
     return _UZA_CBSA_CACHE
 
 
-def _uza_to_cbsa(uza_name: str) -> str:
-    """Match a UZA name string to a CBSA code using Census-derived index."""
-    if not uza_name or pd.isna(uza_name):
-        return ""
-    if "non-uza" in uza_name.lower():
-        return ""
-
+def _uza_to_cbsa(uza_names: pd.Series) -> pd.Series:
+    """Match UZA name strings to CBSA codes using the Census-derived index.
+    Returns a Series aligned to uza_names, with "" where nothing matched."""
+    out = np.full(len(uza_names), "", dtype=object)
+    names = uza_names.fillna("").astype(str).to_numpy()
+    keep = np.flatnonzero(
+        (names != "") & ~pd.Series(names).str.lower().str.contains("non-uza", regex=False)
+    )
     idx = _build_uza_cbsa_map()
-    if not idx:
-        return ""
+    if not idx or len(keep) == 0:
+        return pd.Series(out, index=uza_names.index)
 
     # Parse UZA: "City1--City2, ST" or "City1--City2, ST1-ST2"
-    parts = uza_name.split(",")
-    city_part = parts[0].strip()
-    state_part = parts[1].strip() if len(parts) > 1 else ""
-    cities = [c.strip().lower() for c in re.split(r"--|/", city_part)]
-    states = [s.strip().upper() for s in re.split(r"[-/]", state_part) if s.strip()]
-
-    # Try city+state first
-    for city in cities:
-        for state in states:
-            cbsa = idx["city_state"].get((city, state))
-            if cbsa:
-                return cbsa
-
-    # Fallback: unambiguous city match
-    for city in cities:
-        cbsa = idx["city_only"].get(city)
-        if cbsa:
-            return cbsa
-
-    return ""
+    parts = pd.Series(names[keep]).str.split(",")
+    city_part = parts.str[0].str.strip()
+    state_part = parts.str[1].fillna("").str.strip()
+
+    # One row per (input row, city) and (input row, state), keeping the
+    # original order so the first city/state pair wins as before
+    cities = pd.DataFrame({
+        "row": keep, "city": city_part.str.split(r"--|/", regex=True).to_numpy(),
+    }).explode("city")
+    cities["city"] = cities["city"].str.strip().str.lower()
+    cities["city_pos"] = cities.groupby("row").cumcount()
+    states = pd.DataFrame({
+        "row": keep, "state": state_part.str.split(r"[-/]", regex=True).to_numpy(),
+    }).explode("state")
+    states["state"] = states["state"].str.strip().str.upper()
+    states = states[states["state"] != ""]
+    states["state_pos"] = states.groupby("row").cumcount()
+
+    # Fallback first: unambiguous city match; city+state hits overwrite it
+    cities["cbsa_code"] = idx["city_only"].reindex(cities["city"]).to_numpy()
+    only = cities.dropna(subset=["cbsa_code"]).groupby("row")["cbsa_code"].first()
+    out[only.index.to_numpy()] = only.to_numpy()
+
+    pairs = cities[["row", "city", "city_pos"]].merge(states, on="row")
+    pairs["cbsa_code"] = idx["city_state"].reindex(
+        pd.MultiIndex.from_arrays([pairs["city"], pairs["state"]])
+    ).to_numpy()
+    both = (
+        pairs.dropna(subset=["cbsa_code"])
+        .sort_values(["row", "city_pos", "state_pos"])
+        .groupby("row")["cbsa_code"].first()
+    )
+    out[both.index.to_numpy()] = both.to_numpy()
+    return pd.Series(out, index=uza_names.index)
+
+
+# Curated agencies, stored column-wise; see _builtin_agencies_cached
+_AGENCY_CBSA = (
+    "35620", "35620", "35620", "35620", "31080", "31080", "31080", "16980", "16980",
+    "16980", "19100", "19100", "26420", "47900", "33100", "33100", "37980", "12060",
+    "14460", "38060", "41860", "41860", "40140", "19820", "19820", "42660", "42660",
+    "33460", "41740", "45300", "19740", "41180", "12580", "36740", "16740", "41700",
+    "38900", "40900", "38300", "12420", "28140", "17460", "18140", "26900", "29820",
+    "34980", "47260", "39300", "27260", "33340", "36420", "41620", "46060", "46140",
+    "21340", "10740", "36540", "30700", "22020", "14260",
+)
+_AGENCY_NAME = (
+    "MTA New York City Transit",
+    "MTA Bus Company",
+    "NJ Transit",
+    "Port Authority Trans-Hudson",
+    "LA Metro",
+    "OCTA",
+    "Metrolink",
+    "CTA",
+    "Metra",
+    "Pace",
+    "DART",
+    "Trinity Metro",
+    "METRO Houston",
+    "WMATA",
+    "Miami-Dade Transit",
+    "Broward County Transit",
+    "SEPTA",
+    "MARTA",
+    "MBTA",
+    "Valley Metro",
+    "BART",
+    "SF Muni",
+    "Omnitrans",
+    "DDOT",
+    "SMART",
+    "Sound Transit",
+    "King County Metro",
+    "Metro Transit",
+    "MTS San Diego",
+    "HART",
+    "RTD Denver",
+    "Metro St. Louis",
+    "MTA Maryland",
+    "LYNX Orlando",
+    "CATS Charlotte",
+    "VIA Metropolitan Transit",
+    "TriMet",
+    "SacRT",
+    "Pittsburgh Regional Transit",
+    "Cap Metro",
+    "KCATA",
+    "GCRTA",
+    "COTA",
+    "IndyGo",
+    "RTC Southern Nevada",
+    "WeGo Nashville",
+    "Hampton Roads Transit",
+    "RIPTA",
+    "JTA",
+    "MCTS Milwaukee",
+    "EMBARK OKC",
+    "UTA",
+    "Sun Tran Tucson",
+    "Tulsa Transit",
+    "Sun Metro El Paso",
+    "ABQ Ride",
+    "Metro Transit Omaha",
+    "StarTran",
+    "MATBUS",
+    "Valley Regional Transit",
+)
+_AGENCY_CITY = (
+    "New York",
+    "New York",
+    "Newark",
+    "New York",
+    "Los Angeles",
+    "Orange",
+    "Los Angeles",
+    "Chicago",
+    "Chicago",
+    "Arlington Heights",
+    "Dallas",
+    "Fort Worth",
+    "Houston",
+    "Washington",
+    "Miami",
+    "Fort Lauderdale",
+    "Philadelphia",
+    "Atlanta",
+    "Boston",
+    "Phoenix",
+    "San Francisco",
+    "San Francisco",
+    "San Bernardino",
+    "Detroit",
+    "Detroit",
+    "Seattle",
+    "Seattle",
+    "Minneapolis",
+    "San Diego",
+    "Tampa",
+    "Denver",
+    "St. Louis",
+    "Baltimore",
+    "Orlando",
+    "Charlotte",
+    "San Antonio",
+    "Portland",
+    "Sacramento",
+    "Pittsburgh",
+    "Austin",
+    "Kansas City",
+    "Cleveland",
+    "Columbus",
+    "Indianapolis",
+    "Las Vegas",
+    "Nashville",
+    "Norfolk",
+    "Providence",
+    "Jacksonville",
+    "Milwaukee",
+    "Oklahoma City",
+    "Salt Lake City",
+    "Tucson",
+    "Tulsa",
+    "El Paso",
+    "Albuquerque",
+    "Omaha",
+    "Lincoln",
+    "Fargo",
+    "Boise",
+)
+_AGENCY_STATE = (
+    "NY", "NY", "NJ", "NY", "CA", "CA", "CA", "IL", "IL", "IL", "TX", "TX", "TX", "DC",
+    "FL", "FL", "PA", "GA", "MA", "AZ", "CA", "CA", "CA", "MI", "MI", "WA", "WA", "MN",
+    "CA", "FL", "CO", "MO", "MD", "FL", "NC", "TX", "OR", "CA", "PA", "TX", "MO", "OH",
+    "OH", "IN", "NV", "TN", "VA", "RI", "FL", "WI", "OK", "UT", "AZ", "OK", "TX", "NM",
+    "NE", "NE", "ND", "ID",
+)
+_AGENCY_MODES = (
+    "HR,Bus", "Bus", "CR,Bus,LR", "HR", "HR,LR,Bus", "Bus", "CR", "HR,Bus", "CR", "Bus",
+    "LR,Bus", "Bus,CR", "LR,Bus", "HR,Bus", "HR,Bus", "Bus", "HR,CR,LR,Bus", "HR,Bus",
+    "HR,CR,LR,Bus", "LR,Bus", "HR", "LR,Bus", "Bus", "Bus", "Bus", "LR,CR,Bus", "Bus",
+    "LR,Bus", "LR,Bus", "Bus", "LR,CR,Bus", "LR,Bus", "HR,LR,Bus", "Bus", "LR,Bus",
+    "Bus", "LR,CR,Bus", "LR,Bus", "LR,Bus", "Bus,CR", "Bus", "HR,Bus", "Bus", "Bus",
+    "Bus", "Bus", "LR,Bus", "Bus", "Bus", "Bus", "Bus", "LR,CR,Bus", "Bus", "Bus",
+    "Bus", "Bus", "Bus", "Bus", "Bus", "Bus",
+)
+_AGENCY_HAS_RAIL = np.array([
+    True, False, True, True, True, False, True, True, True, False, True, True, True,
+    True, True, False, True, True, True, True, True, True, False, False, False, True,
+    False, True, True, False, True, True, True, False, True, False, True, True, True,
+    True, False, True, False, False, False, False, True, False, False, False, False,
+    True, False, False, False, False, False, False, False, False,
+], dtype=bool)
 
 
 def _builtin_agencies() -> pd.DataFrame:
     """Curated list covering the top ~70 MSAs."""
-    # (cbsa_code, agency, city, state, modes, has_rail)
-    rows = [
-        ("35620", "MTA New York City Transit", "New York", "NY", "HR,Bus", True),
-        ("35620", "MTA Bus Company", "New York", "NY", "Bus", False),
-        ("35620", "NJ Transit", "Newark", "NJ", "CR,Bus,LR", True),
-        ("35620", "Port Authority Trans-Hudson", "New York", "NY", "HR", True),
-        ("31080", "LA Metro", "Los Angeles", "CA", "HR,LR,Bus", True),
-        ("31080", "OCTA", "Orange", "CA", "Bus", False),
-        ("31080", "Metrolink", "Los Angeles", "CA", "CR", True),
-        ("16980", "CTA", "Chicago", "IL", "HR,Bus", True),
-        ("16980", "Metra", "Chicago", "IL", "CR", True),
-        ("16980", "Pace", "Arlington Heights", "IL", "Bus", False),
-        ("19100", "DART", "Dallas", "TX", "LR,Bus", True),
-        ("19100", "Trinity Metro", "Fort Worth", "TX", "Bus,CR", True),
-        ("26420", "METRO Houston", "Houston", "TX", "LR,Bus", True),
-        ("47900", "WMATA", "Washington", "DC", "HR,Bus", True),
-        ("33100", "Miami-Dade Transit", "Miami", "FL", "HR,Bus", True),
-        ("33100", "Broward County Transit", "Fort Lauderdale", "FL", "Bus", False),
-        ("37980", "SEPTA", "Philadelphia", "PA", "HR,CR,LR,Bus", True),
-        ("12060", "MARTA", "Atlanta", "GA", "HR,Bus", True),
-        ("14460", "MBTA", "Boston", "MA", "HR,CR,LR,Bus", True),
-        ("38060", "Valley Metro", "Phoenix", "AZ", "LR,Bus", True),
-        ("41860", "BART", "San Francisco", "CA", "HR", True),
-        ("41860", "SF Muni", "San Francisco", "CA", "LR,Bus", True),
-        ("40140", "Omnitrans", "San Bernardino", "CA", "Bus", False),
-        ("19820", "DDOT", "Detroit", "MI", "Bus", False),
-        ("19820", "SMART", "Detroit", "MI", "Bus", False),
-        ("42660", "Sound Transit", "Seattle", "WA", "LR,CR,Bus", True),
-        ("42660", "King County Metro", "Seattle", "WA", "Bus", False),
-        ("33460", "Metro Transit", "Minneapolis", "MN", "LR,Bus", True),
-        ("41740", "MTS San Diego", "San Diego", "CA", "LR,Bus", True),
-        ("45300", "HART", "Tampa", "FL", "Bus", False),
-        ("19740", "RTD Denver", "Denver", "CO", "LR,CR,Bus", True),
-        ("41180", "Metro St. Louis", "St. Louis", "MO", "LR,Bus", True),
-        ("12580", "MTA Maryland", "Baltimore", "MD", "HR,LR,Bus", True),
-        ("36740", "LYNX Orlando", "Orlando", "FL", "Bus", False),
-        ("16740", "CATS Charlotte", "Charlotte", "NC", "LR,Bus", True),
-        ("41700", "VIA Metropolitan Transit", "San Antonio", "TX", "Bus", False),
-        ("38900", "TriMet", "Portland", "OR", "LR,CR,Bus", True),
-        ("40900", "SacRT", "Sacramento", "CA", "LR,Bus", True),
-        ("38300", "Pittsburgh Regional Transit", "Pittsburgh", "PA", "LR,Bus", True),
-        ("12420", "Cap Metro", "Austin", "TX", "Bus,CR", True),
-        ("28140", "KCATA", "Kansas City", "MO", "Bus", False),
-        ("17460", "GCRTA", "Cleveland", "OH", "HR,Bus", True),
-        ("18140", "COTA", "Columbus", "OH", "Bus", False),
-        ("26900", "IndyGo", "Indianapolis", "IN", "Bus", False),
-        ("29820", "RTC Southern Nevada", "Las Vegas", "NV", "Bus", False),
-        ("34980", "WeGo Nashville", "Nashville", "TN", "Bus", False),
-        ("47260", "Hampton Roads Transit", "Norfolk", "VA", "LR,Bus", True),
-        ("39300", "RIPTA", "Providence", "RI", "Bus", False),
-        ("27260", "JTA", "Jacksonville", "FL", "Bus", False),
-        ("33340", "MCTS Milwaukee", "Milwaukee", "WI", "Bus", False),
-        ("36420", "EMBARK OKC", "Oklahoma City", "OK", "Bus", False),
-        ("41620", "UTA", "Salt Lake City", "UT", "LR,CR,Bus", True),
-        ("46060", "Sun Tran Tucson", "Tucson", "AZ", "Bus", False),
-        ("46140", "Tulsa Transit", "Tulsa", "OK", "Bus", False),
-        ("21340", "Sun Metro El Paso", "El Paso", "TX", "Bus", False),
-        ("10740", "ABQ Ride", "Albuquerque", "NM", "Bus", False),
-        ("36540", "Metro Transit Omaha", "Omaha", "NE", "Bus", False),
-        ("30700", "StarTran", "Lincoln", "NE", "Bus", False),
-        ("22020", "MATBUS", "Fargo", "ND", "Bus", False),
-        ("14260", "Valley Regional Transit", "Boise", "ID", "Bus", False),
-    ]
-    df = pd.DataFrame(rows, columns=[
-        "cbsa_code", "agency_name", "city", "state", "modes", "has_rail",
-    ])
+    return _builtin_agencies_cached().copy()
+
+
+@lru_cache(maxsize=1)
+def _builtin_agencies_cached() -> pd.DataFrame:
+    """Build the fallback frame once; callers must not mutate the result."""
+    df = pd.DataFrame({
+        "cbsa_code": _AGENCY_CBSA,
+        "agency_name": _AGENCY_NAME,
+        "city": _AGENCY_CITY,
+        "state": _AGENCY_STATE,
+        "modes": _AGENCY_MODES,
+        "has_rail": _AGENCY_HAS_RAIL,
+    }, copy=False)
     df["ntd_id"] = ""
     return df[["ntd_id", "agency_name", "cbsa_code", "city", "state", "modes", "has_rail"]]
 
 
+@lru_cache(maxsize=1)
+def _rail_cbsas() -> np.ndarray:
+    """CBSAs known to have rail service, used to enrich parsed NTD files."""
+    b = _builtin_agencies_cached()
+    return np.unique(b.loc[b["has_rail"], "cbsa_code"].to_numpy(dtype="U5"))
+
+
 def agencies_by_cbsa(agencies: pd.DataFrame) -> pd.DataFrame:
     """Aggregate to one row per CBSA: agency count, agency list, rail flag."""
-    grouped = agencies.groupby("cbsa_code").agg(
-        n_agencies=("agency_name", "count"),
-        agency_list=("agency_name", lambda s: "; ".join(s)),
-        has_rail=("has_rail", "any"),
-    ).reset_index()
+    by_cbsa = agencies.groupby("cbsa_code")
+    grouped = pd.DataFrame({
+        "n_agencies": by_cbsa["agency_name"].count(),
+        "agency_list": by_cbsa["agency_name"].agg(list).str.join("; "),
+        "has_rail": by_cbsa["has_rail"].any(),
+    }).reset_index()
     return grouped
@@ -3,6 +3,7 @@ Output: CSV, summary report, and optional map visualization.
 """
 import logging
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 from metro_sampler.config import OUTPUT_DIR
@@ -28,10 +29,82 @@ def save_sample_csv(sample: pd.DataFrame, filename: str = "msa_sample.csv") -> P
     return out
 
 
+# (heading, column) for each categorical breakdown in the summary report
+CAT_COLS = [
+    ("Selection method breakdown", "selection_method"),
+    ("Population stratum", "pop_stratum"),
+    ("Census region", "census_region"),
+    ("Rail presence", "has_rail"),
+    ("Shared mobility presence", "has_shared_mobility"),
+]
+
+
+def _format_table(keys: list[str], values: list[str]) -> list[str]:
+    """Two aligned columns, laid out like Series.to_string()."""
+    kw = max(map(len, keys), default=0)
+    vw = max(map(len, values), default=0)
+    return [f"{k:<{kw}}    {v:>{vw}}" for k, v in zip(keys, values)]
+
+
+def _format_counts(vc: pd.Series) -> str:
+    """value_counts() result as text, headed by the column name."""
+    keys = [str(k) for k in vc.index]
+    values = [str(v) for v in vc.to_numpy()]
+    return "\n".join([str(vc.index.name), *_format_table(keys, values)])
+
+
+def _format_floats(values: np.ndarray) -> list[str]:
+    """Six decimals, trailing zeros trimmed across the column. Matches
+    pandas only for non-negative values that are 0 or in [1e-6, 1e6)."""
+    out = [f"{v:.6f}" for v in values if not np.isnan(v)]
+    while out and all(v.endswith("0") and not v.endswith(".0") for v in out):
+        out = [v[:-1] for v in out]
+    it = iter(out)
+    return ["NaN" if np.isnan(v) else next(it) for v in values]
+
+
+def _format_describe(values: np.ndarray) -> str:
+    """describe() summary of a numeric array as text. Hand-formatted when
+    the values are non-negative and every statistic is 0 or in [1e-6, 1e6),
+    which covers sample weights; otherwise pandas formats it (padding for
+    negatives, scientific notation for very large or small values)."""
+    # Mean/std sum over the NaN-zeroed array like pandas' nanops, so the
+    # last bit (and hence rounding at the sixth decimal) agrees
+    missing = np.isnan(values)
+    n = int(values.size - missing.sum())
+    mean = np.where(missing, 0.0, values).sum() / n if n else np.nan
+    sq_dev = np.where(missing, 0.0, values - mean) ** 2
+    present = values[~missing]
+    stats = np.array([
+        float(n),
+        mean,
+        np.sqrt(sq_dev.sum() / (n - 1)) if n > 1 else np.nan,
+        *(np.quantile(present, [0, 0.25, 0.5, 0.75, 1]) if n else [np.nan] * 5),
+    ])
+    finite = stats[~np.isnan(stats)]
+    in_range = (finite == 0) | ((finite >= 1e-6) & (finite < 1e6))
+    if np.signbit(present).any() or not in_range.all():  # signbit: -0.0 too
+        return pd.Series(values).describe().to_string()
+    keys = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    return "\n".join(_format_table(keys, _format_floats(stats)))
+
+
 def summary_report(sample: pd.DataFrame, universe: pd.DataFrame) -> str:
     """Return a text summary report."""
-    total_pop = universe["population"].sum()
-    sample_pop = sample["population"].sum()
+    # Population array feeds both the coverage total and the MSA listing
+    pop_arr = sample["population"].to_numpy()
+    total_pop = int(universe["population"].sum())
+    sample_pop = int(pop_arr.sum())
+
+    # One value_counts per column, computed up front. Categoricals are
+    # counted as str so unsampled categories don't show as zero rows.
+    vc = {}
+    for _, col in CAT_COLS:
+        values = sample[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str)
+        vc[col] = values.value_counts()
+
     lines = [
         "=" * 65,
         "  MSA SAMPLE – SUMMARY REPORT",
@@ -41,31 +114,22 @@ def summary_report(sample: pd.DataFrame, universe: pd.DataFrame) -> str:
         f"Population coverage:  {sample_pop:,} / {total_pop:,} "
         f"({sample_pop / total_pop:.1%})",
         "",
-        "── Selection method breakdown ──",
-        sample["selection_method"].value_counts().to_string(),
-        "",
-        "── Population stratum ──",
-        sample["pop_stratum"].value_counts().to_string(),
-        "",
-        "── Census region ──",
-        sample["census_region"].value_counts().to_string(),
-        "",
-        "── Rail presence ──",
-        sample["has_rail"].value_counts().to_string(),
-        "",
-        "── Shared mobility presence ──",
-        sample["has_shared_mobility"].value_counts().to_string(),
-        "",
+    ]
+    for heading, col in CAT_COLS:
+        lines += [f"── {heading} ──", _format_counts(vc[col]), ""]
+    lines += [
         "── Sample weight summary ──",
-        sample["sample_weight"].describe().to_string(),
+        _format_describe(sample["sample_weight"].to_numpy(dtype=float)),
         "",
         "── Selected MSAs ──",
     ]
-    for _, r in sample.iterrows():
-        lines.append(
-            f"  {r['cbsa_code']}  {r['msa_name']:<55s} "
-            f"pop={r['population']:>12,}  method={r['selection_method']}"
+    lines.extend(
+        f"  {code}  {name:<55s} pop={pop:>12,}  method={method}"
+        for code, name, pop, method in zip(
+            sample["cbsa_code"].to_numpy(), sample["msa_name"].to_numpy(),
+            pop_arr, sample["selection_method"].to_numpy(),
         )
+    )
     lines.append("=" * 65)
     return "\n".join(lines)
 
@@ -80,12 +144,8 @@ def save_report(report_text: str, filename: str = "sample_report.txt") -> Path:
 
 def plot_map(sample: pd.DataFrame, filename: str = "sample_map.png") -> Path | None:
     """Optional: plot selected MSAs on a US map using approximate coords."""
-    try:
-        import matplotlib
-        matplotlib.use("Agg")
-        import matplotlib.pyplot as plt
-    except ImportError:
-        log.warning("matplotlib not available – skipping map")
+    if sample.empty:
+        log.info("Empty sample – skipping map")
         return None
 
     # Approximate lat/lon for selected MSAs (good enough for a dot map)
@@ -110,6 +170,22 @@ def plot_map(sample: pd.DataFrame, filename: str = "sample_map.png") -> Path | N
         "24860": (34.9, -82.4), "13820": (33.5, -86.8),
     }
 
+    coords = sample["cbsa_code"].map(COORDS)
+    mask = coords.notna().to_numpy()
+    if not mask.any():
+        log.info("No sampled MSA has map coordinates – skipping map")
+        return None
+
+    # Imported only once there is something to draw (matplotlib start-up
+    # is a noticeable share of a pipeline run)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        log.warning("matplotlib not available – skipping map")
+        return None
+
     fig, ax = plt.subplots(figsize=(12, 7))
     ax.set_xlim(-130, -65)
     ax.set_ylim(24, 50)
@@ -117,18 +193,20 @@ def plot_map(sample: pd.DataFrame, filename: str = "sample_map.png") -> Path | N
     ax.set_facecolor("#f0f4f8")
     ax.set_title("Selected MSA Sample", fontsize=14, fontweight="bold")
 
-    for _, row in sample.iterrows():
-        coords = COORDS.get(row["cbsa_code"])
-        if not coords:
-            continue
-        lat, lon = coords
-        size = max(20, row["population"] / 200_000)
-        color = {"mandatory_top10": "#e63946", "stratified_random": "#457b9d",
-                 "coverage_boost": "#2a9d8f"}.get(row["selection_method"], "#999")
-        ax.scatter(lon, lat, s=size, c=color, alpha=0.75, edgecolors="white", linewidths=0.5)
-        if row["population"] > 3_000_000:
-            ax.annotate(row["msa_name"].split(",")[0].split("-")[0],
-                        (lon, lat), fontsize=6, ha="center", va="bottom")
+    # One scatter call over all plotted metros instead of one per row
+    colors = {"mandatory_top10": "#e63946", "stratified_random": "#457b9d",
+              "coverage_boost": "#2a9d8f"}
+    plotted = sample[mask]
+    lat, lon = np.array(coords[mask].tolist(), dtype=float).reshape(-1, 2).T
+    sizes = np.maximum(20, plotted["population"].to_numpy(dtype=float) / 200_000)
+    ax.scatter(lon, lat, s=sizes,
+               c=plotted["selection_method"].map(colors).fillna("#999").tolist(),
+               alpha=0.75, edgecolors="white", linewidths=0.5,
+               rasterized=True)  # dots as a bitmap, axes/text stay vector
+    big = plotted["population"].to_numpy() > 3_000_000
+    for name, x, y in zip(plotted["msa_name"].to_numpy()[big], lon[big], lat[big]):
+        ax.annotate(name.split(",")[0].split("-")[0],
+                    (x, y), fontsize=6, ha="center", va="bottom")
 
     # Legend
     for label, color in [("Mandatory top-10", "#e63946"),
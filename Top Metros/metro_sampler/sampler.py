@@ -9,6 +9,7 @@ Steps:
 5. Compute sample weights for later analysis.
 """
 import logging
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 
@@ -24,33 +25,74 @@ from metro_sampler.config import (
 
 log = logging.getLogger(__name__)
 
+# POP_STRATA as ascending [lo, hi) bin edges plus matching labels
+_POP_BOUNDS = sorted(POP_STRATA.items(), key=lambda kv: kv[1][0])
+_POP_EDGES = np.array([lo for _, (lo, _) in _POP_BOUNDS] + [_POP_BOUNDS[-1][1][1]], dtype=float)
+_POP_LABELS = np.array([label for label, _ in _POP_BOUNDS], dtype=object)
+
+# Below this many rows the JIT compile costs more than pd.cut saves
+_NUMBA_MIN_ROWS = 100_000
+
+
+@lru_cache(maxsize=1)
+def _numba_bucketer():
+    """JIT population bucketer (None without numba). For each value,
+    returns the index of its [lo, hi) bin in edges, or -1 if outside all.
+    Built on first use so numba is only imported for very large frames."""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    @njit(cache=True)
+    def bucketize(values, edges):
+        n_bins = edges.size - 1
+        out = np.empty(values.size, np.int64)
+        for i in range(values.size):
+            v = values[i]
+            k = -1
+            if v >= edges[0] and v < edges[n_bins]:  # false for NaN too
+                k = 0
+                while v >= edges[k + 1]:
+                    k += 1
+            out[i] = k
+        return out
+
+    return bucketize
+
 
 def assign_strata(msa_df: pd.DataFrame) -> pd.DataFrame:
     """Add stratum columns to the MSA frame."""
     df = msa_df.copy()
 
-    # Population stratum
-    def _pop_stratum(pop):
-        for label, (lo, hi) in POP_STRATA.items():
-            if lo <= pop < hi:
-                return label
-        return "Small"
-    df["pop_stratum"] = df["population"].apply(_pop_stratum)
+    # Population stratum: one binning pass over the POP_STRATA bounds
+    bucketize = _numba_bucketer() if len(df) >= _NUMBA_MIN_ROWS else None
+    if bucketize is not None:
+        k = bucketize(df["population"].to_numpy(dtype=float, na_value=np.nan), _POP_EDGES)
+        df["pop_stratum"] = np.where(k >= 0, _POP_LABELS[k], "Small")
+    else:
+        df["pop_stratum"] = (
+            pd.cut(df["population"], bins=_POP_EDGES, labels=_POP_LABELS.tolist(),
+                   right=False, include_lowest=True)
+            .astype(object).fillna("Small")
+        )
 
     # Rail stratum (should already be merged)
     if "has_rail" not in df.columns:
         df["has_rail"] = False
-    df["rail_stratum"] = df["has_rail"].map({True: "Rail", False: "NoRail"})
+    df["rail_stratum"] = np.where(df["has_rail"].to_numpy(dtype=bool), "Rail", "NoRail")
 
     # Shared mobility
     if "has_shared_mobility" not in df.columns:
         df["has_shared_mobility"] = False
-    df["sm_stratum"] = df["has_shared_mobility"].map({True: "SM", False: "NoSM"})
+    df["sm_stratum"] = np.where(df["has_shared_mobility"].to_numpy(dtype=bool), "SM", "NoSM")
 
-    # Composite stratum key
+    # Composite stratum key, built in one pass; categorical so downstream
+    # value_counts/groupby work on integer codes
     df["stratum"] = (
-        df["pop_stratum"] + "_" + df["rail_stratum"] + "_" +
-        df["sm_stratum"] + "_" + df["census_region"]
+        df["pop_stratum"]
+        .str.cat([df["rail_stratum"], df["sm_stratum"], df["census_region"].astype(str)], sep="_")
+        .astype("category")
     )
     return df
 
@@ -58,101 +100,116 @@ def assign_strata(msa_df: pd.DataFrame) -> pd.DataFrame:
 def select_sample(msa_df: pd.DataFrame) -> pd.DataFrame:
     """Return the final sample DataFrame with selection_method and weight."""
     df = assign_strata(msa_df)
+    try:
+        # Arrow-backed columns: string ops and groupby run in Arrow kernels
+        df = df.convert_dtypes(dtype_backend="pyarrow")
+    except ImportError:
+        pass  # pyarrow not installed – keep NumPy-backed dtypes
     total_pop = df["population"].sum()
 
     # 1. Mandatory: top N by population
-    mandatory = df.head(TOP_N_MANDATORY).copy()
-    mandatory["selection_method"] = "mandatory_top10"
+    mandatory = df.head(TOP_N_MANDATORY).assign(selection_method="mandatory_top10")
 
-    # 2. Remaining MSAs available for random sampling
-    remaining_pool = df.iloc[TOP_N_MANDATORY:].copy()
+    # 2. Remaining MSAs available for random sampling (read-only slice)
+    remaining_pool = df.iloc[TOP_N_MANDATORY:]
     slots_left = TARGET_SAMPLE_SIZE - len(mandatory)
 
     # Proportional allocation across composite strata
     rng = np.random.default_rng(RANDOM_SEED)
-    stratum_counts = remaining_pool["stratum"].value_counts().to_dict()
+    # Partition the pool once from the categorical codes: bincount gives the
+    # stratum sizes, a stable argsort split by those sizes gives each
+    # stratum's row positions. Largest stratum first, ties in order of
+    # appearance. Rows with a missing stratum (code -1) are left out, as
+    # groupby(observed=True) would.
+    strata = remaining_pool["stratum"]
+    codes = strata.cat.codes.to_numpy()
+    valid = np.flatnonzero(codes >= 0)
+    codes = codes[valid]
+    code_counts = np.bincount(codes, minlength=len(strata.cat.categories))
+    buckets = np.split(valid[np.argsort(codes, kind="stable")], np.cumsum(code_counts)[:-1])
+    seen = pd.unique(codes)
+    seen = seen[np.argsort(-code_counts[seen], kind="stable")]
+    names = strata.cat.categories[seen].tolist()
+    stratum_counts = dict(zip(names, code_counts[seen].tolist()))
+    groups = dict(zip(names, (buckets[c] for c in seen)))
     n_remaining = len(remaining_pool)
 
-    # Initial proportional allocation, capped at stratum size
+    # Largest-remainder (Hamilton) apportionment: floor the proportional
+    # quotas, then hand leftover slots to the largest fractional remainders.
+    # Allocations are capped at stratum size.
     n_strata = len(stratum_counts)
-    allocation = {}
-    for stratum, count in stratum_counts.items():
-        raw = round(slots_left * count / n_remaining)
-        # Only guarantee min-1 if we have enough slots for all strata
-        if n_strata <= slots_left:
-            raw = max(1, raw)
-        allocation[stratum] = min(count, max(0, raw))
-
-    # Iteratively redistribute until allocation == slots_left
-    for _ in range(100):
-        total = sum(allocation.values())
-        if total == slots_left:
-            break
-        if total > slots_left:
-            # Remove from strata with largest allocation first
-            candidates = sorted(allocation, key=lambda s: allocation[s], reverse=True)
-            for s in candidates:
-                if allocation[s] > 0 and sum(allocation.values()) > slots_left:
-                    allocation[s] -= 1
-        else:
-            # Add to strata that have room (available > allocated), largest first
-            candidates = sorted(
-                ((s, stratum_counts[s] - allocation[s]) for s in allocation
-                 if allocation[s] < stratum_counts[s]),
-                key=lambda x: x[1], reverse=True,
-            )
-            if not candidates:
-                break  # all strata fully exhausted
-            for s, room in candidates:
-                if sum(allocation.values()) >= slots_left:
-                    break
-                allocation[s] += 1
-
-    sampled_parts = []
-    for stratum, n_pick in allocation.items():
-        pool = remaining_pool[remaining_pool["stratum"] == stratum]
-        n_pick = min(n_pick, len(pool))
-        if n_pick > 0:
-            picked = pool.sample(n=n_pick, random_state=int(rng.integers(1e9)))
-            sampled_parts.append(picked)
-
-    if sampled_parts:
-        sampled = pd.concat(sampled_parts)
-    else:
-        sampled = pd.DataFrame(columns=df.columns)
-    sampled["selection_method"] = "stratified_random"
+    counts = np.fromiter(stratum_counts.values(), dtype=np.int64, count=n_strata)
+    quota = max(slots_left, 0) * counts / max(n_remaining, 1)
+    alloc = np.floor(quota).astype(np.int64)
+    # Only guarantee min-1 if we have enough slots for all strata
+    min_alloc = 1 if n_strata <= slots_left else 0
+    alloc = np.minimum(np.maximum(alloc, min_alloc), counts)
+    remainder = quota - alloc
+    deficit = max(slots_left, 0) - int(alloc.sum())
+    order = np.argsort(-remainder, kind="stable")
+    while deficit > 0:
+        room = order[alloc[order] < counts[order]]
+        if not len(room):
+            break  # all strata fully exhausted
+        take = room[:deficit]
+        alloc[take] += 1
+        deficit -= len(take)
+    # The min-1 guarantee can overshoot; take back from the smallest remainders
+    order = np.argsort(remainder, kind="stable")
+    while deficit < 0:
+        take = order[alloc[order] > min_alloc][:-deficit]
+        alloc[take] -= 1
+        deficit += len(take)
+    allocation = dict(zip(stratum_counts, alloc.tolist()))
+
+    # Draw row positions per stratum. Seeds for all non-empty draws come
+    # from one vector call; each stratum gets its own seeded RandomState,
+    # matching DataFrame.sample.
+    draws = [(groups[s], min(n, len(groups[s]))) for s, n in allocation.items()]
+    draws = [(idx, n_pick) for idx, n_pick in draws if n_pick > 0]
+    seeds = rng.integers(1e9, size=len(draws)).tolist()
+    picked_idx = [
+        idx[np.random.RandomState(seed).choice(len(idx), size=n_pick, replace=False)]
+        for (idx, n_pick), seed in zip(draws, seeds)
+    ]
+    picked_idx = np.concatenate(picked_idx) if picked_idx else np.array([], dtype=np.intp)
+    sampled = remaining_pool.iloc[picked_idx].assign(selection_method="stratified_random")
 
     # 3. Combine
     sample = pd.concat([mandatory, sampled], ignore_index=True)
 
     # 4. Check coverage; add more if needed
-    pop_coverage = sample["population"].sum() / total_pop
+    covered = sample["population"].sum()
+    pop_coverage = covered / total_pop
     if pop_coverage < MIN_POPULATION_COVERAGE:
         log.info("Coverage %.1f%% < target %.0f%% – adding metros",
                  pop_coverage * 100, MIN_POPULATION_COVERAGE * 100)
         needed = df[~df["cbsa_code"].isin(sample["cbsa_code"])].sort_values(
             "population", ascending=False)
-        for _, row in needed.iterrows():
-            if len(sample) >= MAX_SAMPLE_SIZE:
-                break
-            sample = pd.concat([sample, row.to_frame().T], ignore_index=True)
-            sample.iloc[-1, sample.columns.get_loc("selection_method")] = "coverage_boost"
-            pop_coverage = sample["population"].sum() / total_pop
-            if pop_coverage >= MIN_POPULATION_COVERAGE:
-                break
+        # Take the shortest prefix of `needed` that reaches the target,
+        # without exceeding MAX_SAMPLE_SIZE
+        cum_cov = (covered + needed["population"].cumsum()) / total_pop
+        reached = (cum_cov >= MIN_POPULATION_COVERAGE).to_numpy()
+        k = int(reached.argmax()) + 1 if reached.any() else len(needed)
+        k = min(k, max(0, MAX_SAMPLE_SIZE - len(sample)))
+        boost = needed.iloc[:k].assign(selection_method="coverage_boost")
+        sample = pd.concat([sample, boost], ignore_index=True)
 
     # 5. Compute sample weights
     # Weight = (N_stratum / n_stratum) so each sampled MSA represents
     # N_stratum/n_stratum MSAs in its stratum.
     stratum_N = df["stratum"].value_counts().to_dict()
-    stratum_n = sample["stratum"].value_counts().to_dict()
-    sample["sample_weight"] = sample["stratum"].apply(
-        lambda s: stratum_N.get(s, 1) / stratum_n.get(s, 1)
-    )
+    stratum_n = sample.groupby("stratum", observed=True).size().to_dict()
+    N_ser = sample["stratum"].map(stratum_N).astype(float).fillna(1)
+    n_ser = sample["stratum"].map(stratum_n).astype(float).fillna(1)
     # Mandatory metros get weight = 1 (certainty selections)
-    sample.loc[sample["selection_method"] == "mandatory_top10", "sample_weight"] = 1.0
+    sample["sample_weight"] = np.where(
+        sample["selection_method"].to_numpy() == "mandatory_top10",
+        1.0, (N_ser / n_ser).to_numpy(),
+    )
 
-    sample = sample.sort_values("population", ascending=False).reset_index(drop=True)
+    order = np.argsort(-sample["population"].to_numpy(), kind="stable")
+    sample = sample.take(order).reset_index(drop=True)
     log.info("Final sample: %d MSAs covering %.1f%% of metro population",
              len(sample), sample["population"].sum() / total_pop * 100)
     return sample
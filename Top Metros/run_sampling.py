@@ -5,6 +5,7 @@ MSA Sampling Pipeline – main entry point.
 Usage:
     python run_sampling.py                   # uses fallback data
     CENSUS_API_KEY=xxx python run_sampling.py # uses live Census API
+    python run_sampling.py --no-map          # skip the map (no matplotlib)
 
 Outputs written to ./output/
 """
@@ -26,7 +27,7 @@ logging.basicConfig(
 log = logging.getLogger("pipeline")
 
 
-def main():
+def main(make_map: bool = True):
     # ── 1. Acquire data ─────────────────────────────────────────────────
     log.info("Step 1: Fetching MSA populations")
     msa = fetch_msa_population()
@@ -50,10 +51,10 @@ def main():
     # Fill NAs from merge
     merged["n_agencies"] = merged["n_agencies"].fillna(0).astype(int)
     merged["agency_list"] = merged["agency_list"].fillna("")
-    merged["has_rail"] = merged["has_rail"].fillna(False).infer_objects(copy=False)
+    merged["has_rail"] = merged["has_rail"].fillna(False).astype(bool)
     merged["n_shared_mobility"] = merged["n_shared_mobility"].fillna(0).astype(int)
     merged["shared_mobility_list"] = merged["shared_mobility_list"].fillna("")
-    merged["has_shared_mobility"] = merged["has_shared_mobility"].fillna(False).infer_objects(copy=False)
+    merged["has_shared_mobility"] = merged["has_shared_mobility"].fillna(False).astype(bool)
 
     # ── 3. Data quality checks ──────────────────────────────────────────
     log.info("Step 5: Data quality checks")
@@ -82,7 +83,7 @@ def main():
     report_path = save_report(report_text)
     print("\n" + report_text + "\n")
 
-    map_path = plot_map(sample)
+    map_path = plot_map(sample) if make_map else None
 
     log.info("Done. Outputs in %s", OUTPUT_DIR)
     log.info("  CSV:    %s", csv_path)
@@ -94,4 +95,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(make_map="--no-map" not in sys.argv[1:])
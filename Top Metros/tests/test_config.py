@@ -0,0 +1,6 @@
+from metro_sampler.config import CENSUS_REGIONS, STATE_TO_REGION
+
+
+def test_state_to_region_matches_census_regions():
+    expected = {st: region for region, states in CENSUS_REGIONS.items() for st in states}
+    assert dict(STATE_TO_REGION) == expected
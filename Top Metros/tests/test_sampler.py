@@ -0,0 +1,16 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+from metro_sampler.data_census import _builtin_msa_list  # noqa: E402
+from metro_sampler.sampler import select_sample  # noqa: E402
+
+
+def test_select_sample_tolerates_missing_region():
+    msa = _builtin_msa_list()
+    msa["census_region"] = msa["census_region"].astype(object)
+    msa.loc[[5, 30, 60], "census_region"] = np.nan
+    sample = select_sample(msa)
+    assert 0 < len(sample) <= len(msa)
+    assert not sample["cbsa_code"].duplicated().any()